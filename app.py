@@ -1,28 +1,46 @@
 import os
+import atexit
 import json
 import re
 import uuid
+import zlib
 import time
+import threading
 import csv
+import hashlib
+import hmac
 import calendar
 import unicodedata
 from io import StringIO
 from pathlib import Path
 from datetime import date, datetime, timezone
 from decimal import Decimal
-from collections import defaultdict, deque
-from functools import wraps
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache, wraps
 from typing import Optional, Dict, Any, List
 
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, abort, render_template_string, make_response
+from flask import Flask, Response, request, jsonify, abort, make_response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from werkzeug.exceptions import HTTPException
+from werkzeug.http import http_date
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used when missing
+    orjson = None
+
+try:
+    import redis
+except ImportError:  # optional; finance wizard state stays in Postgres when missing
+    redis = None
+
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 
-from assistant_store import AssistantStore
-from llm_client import MistralClient
+from assistant_store import AssistantStore, AssistantConfig
+from llm_client import MistralClient, CoalescingClient, CachedClient
 from db_store import DBAssistantStore
 
 
@@ -39,14 +57,71 @@ ASSISTANTS_DIR = Path(os.getenv("ASSISTANTS_DIR") or (BASE_DIR / "assistants"))
 
 STORE = AssistantStore(base_dir=str(ASSISTANTS_DIR))
 
+# optional shared state across gunicorn workers (rate limits, finance wizard state)
+REDIS_URL = (os.getenv("REDIS_URL") or "").strip()
+REDIS_TIMEOUT_SECONDS = float(os.getenv("REDIS_TIMEOUT_SECONDS", "2"))
+_redis = (
+    redis.Redis.from_url(REDIS_URL, socket_timeout=REDIS_TIMEOUT_SECONDS, socket_connect_timeout=REDIS_TIMEOUT_SECONDS)
+    if (redis is not None and REDIS_URL) else None
+)
+
+
+def _orjson_default(x):
+    # same wire format as Flask's default provider: HTTP dates, Decimal as string
+    if isinstance(x, date):
+        return http_date(x)
+    if isinstance(x, Decimal):
+        return str(x)
+    if hasattr(x, "__html__"):
+        return str(x.__html__())
+    raise TypeError(f"Object of type {type(x).__name__} is not JSON serializable")
+
+
+# PASSTHROUGH_DATETIME routes date/datetime through _orjson_default instead of orjson's ISO output;
+# SORT_KEYS matches Flask's sort_keys default
+_ORJSON_OPTS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SORT_KEYS
+    if orjson is not None else 0
+)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson (UTF-8 bytes out, no ensure_ascii pass)."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_orjson_default, option=_ORJSON_OPTS).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_orjson_default, option=_ORJSON_OPTS),
+            content_type="application/json; charset=utf-8",
+        )
+
+
+def _json_bytes(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_orjson_default, option=_ORJSON_OPTS)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
 app = Flask(__name__)
 DEBUG_MODE = (os.getenv("FLASK_DEBUG") or "").strip().lower() in ("1", "true", "yes", "on")
 
-# Flask JSON utf-8 (guarded for version differences)
-try:
-    app.json.ensure_ascii = False
-except Exception:
-    pass
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+else:
+    # Flask JSON utf-8 (guarded for version differences)
+    try:
+        app.json.ensure_ascii = False
+    except Exception:
+        pass
 
 DATABASE_URL = (os.getenv("DATABASE_URL") or "").strip()
 db_store = DBAssistantStore(DATABASE_URL) if DATABASE_URL else None
@@ -56,10 +131,16 @@ if db_store:
 
 @app.errorhandler(Exception)
 def _handle_any_exception(e):
-    app.logger.exception("Unhandled exception")
     if isinstance(e, HTTPException):
+        # routine 401/404/429 etc: no traceback formatting
+        if (e.code or 500) < 500:
+            app.logger.warning("%s %s -> %s", request.method, request.path, e.code)
+        else:
+            app.logger.exception("Unhandled exception")
         return jsonify(error=e.name, detail=e.description), (e.code or 500)
 
+    app.logger.exception("Unhandled exception")
+
     if DEBUG_MODE:
         return jsonify(error="server_error", type=e.__class__.__name__, detail=str(e)), 500
 
@@ -88,7 +169,11 @@ def _assistant_enabled(a) -> bool:
 
 
 def _assistant_config(a) -> dict:
-    cfg = _rec_get(a, "config", None) or _rec_get(a, "config_json", None) or {}
+    cfg = _rec_get(a, "config", None)
+    if cfg and isinstance(cfg, dict):
+        # DB records: JSONB already decoded by the driver at row-load
+        return cfg
+    cfg = cfg or _rec_get(a, "config_json", None) or {}
     if isinstance(cfg, str):
         try:
             cfg = json.loads(cfg)
@@ -97,37 +182,60 @@ def _assistant_config(a) -> dict:
     return cfg if isinstance(cfg, dict) else {}
 
 
+# read once at import; restart the process to rotate keys
+_FINANCE_KEY = (os.getenv("FINANCE_KEY") or "").strip()
+_ADMIN_KEY = (os.getenv("ADMIN_API_KEY") or "").strip()
+
+
+def _key_matches(expected: str, provided: str) -> bool:
+    # constant-time compare; bytes so non-ASCII input can't raise
+    return bool(expected) and hmac.compare_digest(expected.encode("utf-8"), provided.encode("utf-8"))
+
+
 def require_key_if_needed(cfg: dict):
     cfg = cfg or {}
     if not (cfg.get("requires_key") or cfg.get("require_key") or cfg.get("finance_requires_key")):
         return
 
-    expected = (os.getenv("FINANCE_KEY") or "").strip()
-    if not expected:
+    if not _FINANCE_KEY:
         abort(500, description="FINANCE_KEY is not configured")
 
     provided = (request.args.get("k") or request.headers.get("X-FINANCE-KEY") or "").strip()
-    if provided != expected:
+    if not _key_matches(_FINANCE_KEY, provided):
         abort(401, description="unauthorized")
 
 
+# public_id -> (expires_at, record) for DB hits only, so a fresh publish is visible at once.
+# Admin publish/unpublish/rotate/reload clear it; other workers catch up within the TTL.
+PUBLIC_ASSISTANT_TTL_SECONDS = float(os.getenv("PUBLIC_ASSISTANT_TTL_SECONDS", "60"))
+_PUBLIC_ASSISTANT_CACHE_MAX = 1024
+_PUBLIC_ASSISTANT_CACHE: Dict[str, tuple] = {}
+
+
+def _public_assistant_cache_clear():
+    _PUBLIC_ASSISTANT_CACHE.clear()
+
+
 def _get_public_assistant(public_id: str):
     # DB-first
     if db_store:
+        now = time.monotonic()
+        hit = _PUBLIC_ASSISTANT_CACHE.get(public_id)
+        if hit is not None and hit[0] > now:
+            return hit[1]
         try:
             rec = db_store.get_by_public_id(public_id)
             if rec is not None:
+                if PUBLIC_ASSISTANT_TTL_SECONDS > 0:
+                    if len(_PUBLIC_ASSISTANT_CACHE) >= _PUBLIC_ASSISTANT_CACHE_MAX:
+                        _PUBLIC_ASSISTANT_CACHE.clear()
+                    _PUBLIC_ASSISTANT_CACHE[public_id] = (now + PUBLIC_ASSISTANT_TTL_SECONDS, rec)
                 return rec
         except Exception:
             app.logger.exception("get_by_public_id failed")
 
-    # fallback filesystem (legacy)
-    for a in STORE.list(enabled_only=False):
-        pid = _rec_get(a, "public_id", None)
-        is_pub = bool(_rec_get(a, "is_public", False))
-        if pid == public_id and is_pub:
-            return a
-
+    # filesystem assistants are never public: config.json carries no
+    # public_id and their records have no config for require_key_if_needed
     return None
 
 
@@ -135,9 +243,7 @@ def _get_public_assistant(public_id: str):
 # Admin auth
 # ---------------------------
 def _is_admin(req) -> bool:
-    expected = (os.getenv("ADMIN_API_KEY") or "").strip()
-    provided = (req.headers.get("X-ADMIN-KEY") or "").strip()
-    return bool(expected) and (provided == expected)
+    return _key_matches(_ADMIN_KEY, (req.headers.get("X-ADMIN-KEY") or "").strip())
 
 
 def admin_required(fn):
@@ -152,9 +258,34 @@ def admin_required(fn):
 # ---------------------------
 # Rate limiting (public chat)
 # ---------------------------
-RATE = defaultdict(lambda: deque())
+# token bucket per IP: ip -> [tokens, last_refill (monotonic s)]; refills MAX_REQ_PER_WINDOW per WINDOW_SECONDS.
+# LRU-bounded to RL_MAX_IPS entries so scanning traffic can't grow it without limit.
+RATE: "OrderedDict[str, List[float]]" = OrderedDict()
+RATE_MAX = int(os.getenv("RL_MAX_IPS", "50000"))
+_rate_lock = threading.Lock()
 WINDOW_SECONDS = int(os.getenv("RL_WINDOW_SECONDS", "60"))
 MAX_REQ_PER_WINDOW = int(os.getenv("RL_MAX_REQ", "20"))
+_RL_REFILL_PER_SEC = MAX_REQ_PER_WINDOW / max(WINDOW_SECONDS, 1)
+
+# Same bucket in Redis when REDIS_URL is set, so the limit holds across workers.
+# KEYS[1]=bucket  ARGV: capacity, refill/s, now (epoch s), ttl (s). Returns 1 if allowed.
+_RL_LUA = """
+local b = redis.call('HMGET', KEYS[1], 't', 'ts')
+local cap = tonumber(ARGV[1])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(b[1]) or cap
+local ts = tonumber(b[2]) or now
+tokens = math.min(cap, tokens + math.max(0, now - ts) * tonumber(ARGV[2]))
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return allowed
+"""
+_rl_script = _redis.register_script(_RL_LUA) if _redis is not None else None
 
 
 def get_client_ip() -> str:
@@ -164,86 +295,209 @@ def get_client_ip() -> str:
     return (request.remote_addr or "unknown").strip()
 
 
+def _rate_limited_redis(ip: str):
+    try:
+        allowed = _rl_script(keys=[f"rl:{ip}"], args=[MAX_REQ_PER_WINDOW, _RL_REFILL_PER_SEC, time.time(), WINDOW_SECONDS + 1])
+    except redis.RedisError as e:
+        app.logger.warning("Redis rate limit unavailable (%s), using in-process limiter", e)
+        return None
+    return not allowed
+
+
+def _rate_limited_local(ip: str) -> bool:
+    now = time.monotonic()
+    with _rate_lock:
+        bucket = RATE.get(ip)
+        if bucket is None:
+            RATE[ip] = [MAX_REQ_PER_WINDOW - 1, now]
+            while len(RATE) > RATE_MAX:
+                RATE.popitem(last=False)
+            return False
+        RATE.move_to_end(ip)
+
+        tokens = min(MAX_REQ_PER_WINDOW, bucket[0] + (now - bucket[1]) * _RL_REFILL_PER_SEC)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return True
+        bucket[0] = tokens - 1
+        return False
+
+
 def rate_limited():
     ip = get_client_ip()
-    now = time.time()
-    q = RATE[ip]
-
-    while q and now - q[0] > WINDOW_SECONDS:
-        q.popleft()
+    limited = _rate_limited_redis(ip) if _rl_script is not None else None
+    if limited is None:
+        limited = _rate_limited_local(ip)
 
-    if len(q) >= MAX_REQ_PER_WINDOW:
+    if limited:
         return jsonify(error="Too many requests, slow down."), 429
-
-    q.append(now)
     return None
 
 
 # ---------------------------
 # Finance DB (Postgres)
 # ---------------------------
-def _finance_conn():
+PG_POOL_MIN = int(os.getenv("PG_POOL_MIN", "1"))
+PG_POOL_MAX = int(os.getenv("PG_POOL_MAX", "10"))
+PG_POOL_TIMEOUT = float(os.getenv("PG_POOL_TIMEOUT", "30"))
+
+_finance_pool = None
+_finance_pool_slots = None
+_finance_pool_lock = threading.Lock()
+
+
+def _get_finance_pool():
+    # created lazily so each gunicorn worker builds its own pool (and, under gevent,
+    # a patched semaphore) after fork
+    global _finance_pool, _finance_pool_slots
+    if _finance_pool is not None:
+        return _finance_pool
+
     dsn = (os.getenv("DATABASE_URL") or "").strip()
     if not dsn:
         return None
 
+    with _finance_pool_lock:
+        if _finance_pool is None:
+            try:
+                _finance_pool = ThreadedConnectionPool(
+                    PG_POOL_MIN, PG_POOL_MAX, dsn, sslmode=os.getenv("PGSSLMODE", "require")
+                )
+            except Exception:
+                _finance_pool = ThreadedConnectionPool(PG_POOL_MIN, PG_POOL_MAX, dsn)
+            # PG_POOL_MIN connections are opened up front; psycopg2 closes returned connections
+            # once minconn are idle, so raise it to keep every connection opened so far
+            _finance_pool.minconn = PG_POOL_MAX
+            _finance_pool_slots = threading.BoundedSemaphore(PG_POOL_MAX)
+            atexit.register(_close_finance_pool)
+    return _finance_pool
+
+
+def _close_finance_pool():
+    global _finance_pool
+    pool, _finance_pool = _finance_pool, None
+    if pool is not None and not pool.closed:
+        pool.closeall()
+
+
+@contextmanager
+def _finance_conn(autocommit: bool = False):
+    """
+    Borrows a pooled connection (yields None when DATABASE_URL is not set).
+    When all PG_POOL_MAX connections are in use it waits up to PG_POOL_TIMEOUT
+    seconds for one to be returned. On return the pool rolls back any open
+    transaction, drops broken connections and keeps the rest open for reuse,
+    so callers only need `with con:` for commit/rollback.
+
+    Single-statement reads pass autocommit=True and skip `with con:`, which
+    saves the BEGIN/COMMIT round trips psycopg2 would otherwise send.
+    """
+    pool = _get_finance_pool()
+    if pool is None:
+        yield None
+        return
+
+    # ThreadedConnectionPool raises instead of waiting once maxconn are checked out
+    slots = _finance_pool_slots
+    if not slots.acquire(timeout=PG_POOL_TIMEOUT):
+        raise PoolError("timed out waiting for a pooled connection")
     try:
-        return psycopg2.connect(dsn, sslmode=os.getenv("PGSSLMODE", "require"))
-    except Exception:
-        return psycopg2.connect(dsn)
+        con = pool.getconn()
+        try:
+            con.autocommit = autocommit
+            yield con
+        finally:
+            pool.putconn(con)
+    finally:
+        slots.release()
+
+
+# DDL only needs to run once per process; the flags turn repeat calls into no-ops
+_FINANCE_SCHEMA_READY = False
+_PENDING_SCHEMA_READY = False
 
 
 def ensure_finance_schema():
-    con = _finance_conn()
-    if not con:
+    global _FINANCE_SCHEMA_READY
+    if _FINANCE_SCHEMA_READY:
         return
-    with con:
-        with con.cursor() as cur:
-            cur.execute(
-                "CREATE TABLE IF NOT EXISTS finance_entries ("
-                " id TEXT PRIMARY KEY,"
-                " created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),"
-                " entry_date DATE NOT NULL,"
-                " property_slug TEXT NOT NULL,"
-                " entry_type TEXT NOT NULL CHECK (entry_type IN ('expense','income')),"
-                " amount NUMERIC(12,2) NOT NULL,"
-                " currency TEXT NOT NULL DEFAULT 'EUR',"
-                " category TEXT,"
-                " label TEXT,"
-                " note TEXT,"
-                " raw_text TEXT"
-                ");"
-            )
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_finance_entries_date ON finance_entries(entry_date);")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_finance_entries_prop ON finance_entries(property_slug);")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_finance_entries_created ON finance_entries(created_at);")
-
-            cur.execute(
-                "CREATE TABLE IF NOT EXISTS finance_merchant_map ("
-                " token TEXT PRIMARY KEY,"
-                " category TEXT NOT NULL,"
-                " updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()"
-                ");"
-            )
-    con.close()
+    with _finance_conn() as con:
+        if not con:
+            return
+        with con:
+            with con.cursor() as cur:
+                cur.execute(
+                    "CREATE TABLE IF NOT EXISTS finance_entries ("
+                    " id TEXT PRIMARY KEY,"
+                    " created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),"
+                    " entry_date DATE NOT NULL,"
+                    " property_slug TEXT NOT NULL,"
+                    " entry_type TEXT NOT NULL CHECK (entry_type IN ('expense','income')),"
+                    " amount NUMERIC(12,2) NOT NULL,"
+                    " currency TEXT NOT NULL DEFAULT 'EUR',"
+                    " category TEXT,"
+                    " label TEXT,"
+                    " note TEXT,"
+                    " raw_text TEXT"
+                    ");"
+                )
+                # serves both date-range filters and the ORDER BY entry_date, created_at listing;
+                # supersedes the old single-column entry_date index
+                cur.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_finance_entries_date_created"
+                    " ON finance_entries(entry_date DESC, created_at DESC);"
+                )
+                cur.execute("DROP INDEX IF EXISTS idx_finance_entries_date;")
+                # report/summary filters: property and/or type plus a date range. INCLUDE carries the
+                # aggregated columns so summaries can be answered from the index alone.
+                cur.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_finance_entries_prop_date_cov"
+                    " ON finance_entries(property_slug, entry_date) INCLUDE (amount, entry_type, category);"
+                )
+                cur.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_finance_entries_type_date_cov"
+                    " ON finance_entries(entry_type, entry_date) INCLUDE (amount);"
+                )
+                cur.execute("DROP INDEX IF EXISTS idx_finance_entries_prop_date;")
+                cur.execute("DROP INDEX IF EXISTS idx_finance_entries_type_date;")
+                cur.execute("DROP INDEX IF EXISTS idx_finance_entries_prop;")
+                # recent / undo_last: newest first, optionally per property
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_finance_entries_created ON finance_entries(created_at);")
+                cur.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_finance_entries_prop_created"
+                    " ON finance_entries(property_slug, created_at DESC);"
+                )
+
+                cur.execute(
+                    "CREATE TABLE IF NOT EXISTS finance_merchant_map ("
+                    " token TEXT PRIMARY KEY,"
+                    " category TEXT NOT NULL,"
+                    " updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()"
+                    ");"
+                )
+    _FINANCE_SCHEMA_READY = True
 
 
 def ensure_finance_pending_schema():
-    con = _finance_conn()
-    if not con:
+    global _PENDING_SCHEMA_READY
+    if _PENDING_SCHEMA_READY:
         return
-    with con:
-        with con.cursor() as cur:
-            cur.execute(
-                "CREATE TABLE IF NOT EXISTS finance_pending ("
-                " public_id TEXT NOT NULL,"
-                " client_id TEXT NOT NULL,"
-                " updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),"
-                " data TEXT NOT NULL,"
-                " PRIMARY KEY (public_id, client_id)"
-                ");"
-            )
-    con.close()
+    with _finance_conn() as con:
+        if not con:
+            return
+        with con:
+            with con.cursor() as cur:
+                cur.execute(
+                    "CREATE TABLE IF NOT EXISTS finance_pending ("
+                    " public_id TEXT NOT NULL,"
+                    " client_id TEXT NOT NULL,"
+                    " updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),"
+                    " data TEXT NOT NULL,"
+                    " PRIMARY KEY (public_id, client_id)"
+                    ");"
+                )
+    _PENDING_SCHEMA_READY = True
 
 
 if DATABASE_URL:
@@ -264,16 +518,45 @@ def _json_safe(x):
     return x
 
 
+# Wizard state is short-lived and read/written on every finance chat turn; with REDIS_URL set
+# it lives in Redis (expiring after FINANCE_PENDING_TTL_SECONDS) instead of the finance_pending table.
+FINANCE_PENDING_TTL_SECONDS = int(os.getenv("FINANCE_PENDING_TTL_SECONDS", "3600"))
+# raw_text accumulates every wizard turn; keep only the most recent tail.
+FINANCE_RAW_TEXT_MAX = int(os.getenv("FINANCE_RAW_TEXT_MAX", "512"))
+
+
+def _pending_key(public_id: str, client_id: str) -> str:
+    return f"finance_pending:{public_id}:{client_id}"
+
+
+@contextmanager
+def _pending_redis_errors():
+    # in Redis mode the wizard state lives only there; falling back to the table would
+    # lose or resurrect state once Redis recovers, so fail the turn with a clear 503
+    try:
+        yield
+    except redis.RedisError as e:
+        abort(503, description=f"finance state store unavailable, please retry ({type(e).__name__})")
+
+
 def finance_pending_get(public_id: str, client_id: str):
+    if _redis is not None:
+        with _pending_redis_errors():
+            raw = _redis.get(_pending_key(public_id, client_id))
+        if not raw:
+            return None
+        try:
+            return _json_loads(raw) or {}
+        except Exception:
+            return None
+
     ensure_finance_pending_schema()
-    con = _finance_conn()
-    if not con:
-        return None
-    with con:
+    with _finance_conn(autocommit=True) as con:
+        if not con:
+            return None
         with con.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("SELECT data FROM finance_pending WHERE public_id=%s AND client_id=%s", (public_id, client_id))
             row = cur.fetchone()
-    con.close()
     if not row:
         return None
     try:
@@ -281,7 +564,7 @@ def finance_pending_get(public_id: str, client_id: str):
         # Handle case where data is already a string (legacy or manual insert)
         if isinstance(d, str):
             try:
-                d = json.loads(d)
+                d = _json_loads(d)
             except Exception:
                 pass
         return d or {}
@@ -290,65 +573,108 @@ def finance_pending_get(public_id: str, client_id: str):
 
 
 def finance_pending_upsert(public_id: str, client_id: str, data: dict):
-    ensure_finance_pending_schema()
-    con = _finance_conn()
-    if not con:
-        return
     # Convert non-JSON-serializable types to JSON-safe types
     safe = _json_safe(data or {})
-    payload = json.dumps(safe, ensure_ascii=False)
-    with con:
-        with con.cursor() as cur:
-            cur.execute(
-                "INSERT INTO finance_pending (public_id, client_id, data, updated_at)"
-                " VALUES (%s,%s,%s,NOW())"
-                " ON CONFLICT (public_id, client_id)"
-                " DO UPDATE SET data=EXCLUDED.data, updated_at=NOW()",
-                (public_id, client_id, payload),
-            )
-    con.close()
+    payload = _json_bytes(safe)
+    if _redis is not None:
+        with _pending_redis_errors():
+            _redis.set(_pending_key(public_id, client_id), payload, ex=FINANCE_PENDING_TTL_SECONDS)
+        return
+
+    ensure_finance_pending_schema()
+    with _finance_conn() as con:
+        if not con:
+            return
+        with con:
+            with con.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO finance_pending (public_id, client_id, data, updated_at)"
+                    " VALUES (%s,%s,%s,NOW())"
+                    " ON CONFLICT (public_id, client_id)"
+                    " DO UPDATE SET data=EXCLUDED.data, updated_at=NOW()",
+                    (public_id, client_id, payload.decode("utf-8")),
+                )
 
 
 def finance_pending_clear(public_id: str, client_id: str):
-    ensure_finance_pending_schema()
-    con = _finance_conn()
-    if not con:
+    if _redis is not None:
+        with _pending_redis_errors():
+            _redis.delete(_pending_key(public_id, client_id))
         return
-    with con:
-        with con.cursor() as cur:
-            cur.execute("DELETE FROM finance_pending WHERE public_id=%s AND client_id=%s", (public_id, client_id))
-    con.close()
+
+    ensure_finance_pending_schema()
+    with _finance_conn() as con:
+        if not con:
+            return
+        with con:
+            with con.cursor() as cur:
+                cur.execute("DELETE FROM finance_pending WHERE public_id=%s AND client_id=%s", (public_id, client_id))
 
 
 def finance_insert(entry: dict):
-    con = _finance_conn()
-    if not con:
-        raise RuntimeError("db_not_configured")
+    finance_insert_many([entry])
 
-    with con:
-        with con.cursor() as cur:
-            cur.execute(
-                "INSERT INTO finance_entries"
-                " (id, entry_date, property_slug, entry_type, amount, currency, category, label, note, raw_text)"
-                " VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)",
-                (
-                    entry["id"], entry["entry_date"], entry["property_slug"], entry["entry_type"],
-                    entry["amount"], entry.get("currency", "EUR"),
-                    entry.get("category"), entry.get("label"), entry.get("note"), entry.get("raw_text"),
-                ),
-            )
-    con.close()
-
-
-def finance_list(limit=50, property_slug=None, entry_type=None, date_from=None, date_to=None, order="DESC"):
-    con = _finance_conn()
-    if not con:
-        raise RuntimeError("db_not_configured")
 
-    order = (order or "DESC").upper().strip()
-    if order not in ("ASC", "DESC"):
-        order = "DESC"
+_FINANCE_INSERT_COLUMNS = "id, entry_date, property_slug, entry_type, amount, currency, category, label, note, raw_text"
+
+
+def _finance_entry_row(e: dict) -> tuple:
+    return (
+        e["id"], e["entry_date"], e["property_slug"], e["entry_type"],
+        e["amount"], e.get("currency", "EUR"),
+        e.get("category"), e.get("label"), e.get("note"), e.get("raw_text"),
+    )
+
+
+def finance_insert_many(entries: List[dict]):
+    """Inserts all entries in one multi-row INSERT (single round-trip, single transaction)."""
+    if not entries:
+        return
 
+    rows = [_finance_entry_row(e) for e in entries]
+
+    with _finance_conn() as con:
+        if not con:
+            raise RuntimeError("db_not_configured")
+
+        with con:
+            with con.cursor() as cur:
+                execute_values(
+                    cur,
+                    f"INSERT INTO finance_entries ({_FINANCE_INSERT_COLUMNS}) VALUES %s",
+                    rows,
+                    page_size=500,
+                )
+
+
+def finance_insert_and_clear_pending(entry: dict, public_id: str, client_id: str):
+    """
+    Records a finished wizard entry and drops its pending state. With pending state in
+    Postgres both happen in one statement (one round-trip, atomic). With Redis the state
+    is dropped first, so a Redis failure (503) never leaves a saved entry behind a pending
+    wizard that could be confirmed a second time.
+    """
+    if _redis is not None:
+        finance_pending_clear(public_id, client_id)
+        finance_insert(entry)
+        return
+
+    ensure_finance_pending_schema()
+    with _finance_conn() as con:
+        if not con:
+            raise RuntimeError("db_not_configured")
+
+        with con:
+            with con.cursor() as cur:
+                cur.execute(
+                    "WITH cleared AS (DELETE FROM finance_pending WHERE public_id=%s AND client_id=%s)"
+                    f" INSERT INTO finance_entries ({_FINANCE_INSERT_COLUMNS})"
+                    " VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)",
+                    (public_id, client_id) + _finance_entry_row(entry),
+                )
+
+
+def _finance_where(property_slug=None, entry_type=None, date_from=None, date_to=None):
     where = []
     args = []
     if property_slug:
@@ -360,41 +686,154 @@ def finance_list(limit=50, property_slug=None, entry_type=None, date_from=None,
     if date_to:
         where.append("entry_date<=%s"); args.append(date_to)
 
-    sql = "SELECT * FROM finance_entries"
-    if where:
-        sql += " WHERE " + " AND ".join(where)
+    return (" WHERE " + " AND ".join(where) if where else ""), args
+
+
+def _finance_list_query(columns, limit=50, property_slug=None, entry_type=None, date_from=None, date_to=None, order="DESC"):
+    order = (order or "DESC").upper().strip()
+    if order not in ("ASC", "DESC"):
+        order = "DESC"
 
+    where_sql, args = _finance_where(property_slug, entry_type, date_from, date_to)
+    sql = f"SELECT {columns} FROM finance_entries{where_sql}"
     sql += f" ORDER BY entry_date {order}, created_at {order}"
 
     if limit is not None:
         sql += " LIMIT %s"
         args.append(int(limit))
+    return sql, args
+
+
+def finance_report_aggregate(property_slug=None, entry_type=None, date_from=None, date_to=None, top_n=5):
+    """
+    Totals plus the top categories by amount, computed in Postgres so only
+    top_n + 1 rows come back. Returns (count, total, [(category, count, sum), ...]).
+    """
+    where_sql, args = _finance_where(property_slug, entry_type, date_from, date_to)
+    sql = (
+        "WITH f AS ("
+        " SELECT amount, COALESCE(NULLIF(BTRIM(category), ''), 'uncategorized') AS category"
+        f" FROM finance_entries{where_sql}"
+        "), top AS ("
+        " SELECT category, COUNT(*) AS n, SUM(amount) AS total FROM f"
+        " GROUP BY category ORDER BY total DESC, category LIMIT %s"
+        ")"
+        " SELECT 0 AS k, NULL AS category, COUNT(*) AS n, COALESCE(SUM(amount), 0) AS total FROM f"
+        " UNION ALL"
+        " SELECT 1, category, n, total FROM top"
+        " ORDER BY k, total DESC, category"
+    )
+    args.append(int(top_n))
+
+    with _finance_conn(autocommit=True) as con:
+        if not con:
+            raise RuntimeError("db_not_configured")
+
+        with con.cursor() as cur:
+            cur.execute(sql, args)
+            rows = cur.fetchall()
+
+    _, _, count, total = rows[0]
+    top = [(cat, int(n), float(t or 0)) for _, cat, n, t in rows[1:]]
+    return int(count), float(total or 0), top
+
+
+_CSV_HEADER = ["date", "property", "type", "amount", "currency", "category", "label", "id"]
+# every column comes back as text, so the driver builds no date/Decimal objects
+# and csv.writer never falls back to str() per cell
+_CSV_COLUMNS = (
+    "TO_CHAR(entry_date, 'YYYY-MM-DD'), property_slug, entry_type, amount::text,"
+    " COALESCE(currency, 'EUR'), COALESCE(category, ''), COALESCE(label, ''), id"
+)
+
+
+_FINANCE_VERSION_SQL = "SELECT COUNT(*), MAX(created_at) FROM finance_entries"
+
+
+def _finance_version_of(n, newest) -> str:
+    return hashlib.blake2b(f"{n}:{newest}".encode("utf-8"), digest_size=8).hexdigest()
+
+
+def finance_iter_csv_rows(limit=50000, property_slug=None, entry_type=None, date_from=None, date_to=None):
+    """
+    Yields the finance_version() fingerprint first, then plain tuples in
+    _CSV_HEADER order through a server-side cursor, so exports never hold the
+    whole result set in memory. Both come from one REPEATABLE READ snapshot,
+    so the fingerprint always describes the rows that follow. The pooled
+    connection is held until the generator is exhausted or closed.
+    """
+    sql, args = _finance_list_query(_CSV_COLUMNS, limit, property_slug, entry_type, date_from, date_to)
+
+    with _finance_conn() as con:
+        if not con:
+            raise RuntimeError("db_not_configured")
 
-    try:
         with con:
-            with con.cursor(cursor_factory=RealDictCursor) as cur:
+            with con.cursor() as cur:
+                cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                cur.execute(_FINANCE_VERSION_SQL)
+                yield _finance_version_of(*cur.fetchone())
+            with con.cursor(name="finance_csv_export") as cur:
+                cur.itersize = 1000
                 cur.execute(sql, args)
-                rows = cur.fetchall()
-        return rows
-    finally:
-        try:
-            con.close()
-        except Exception:
-            pass
+                yield from cur
+
+
+def finance_version() -> str:
+    """
+    Cheap fingerprint of finance_entries. Entries are only ever inserted or
+    deleted, so (row count, newest created_at) changes whenever the data does.
+    COUNT(*) is still an index-only scan over the table, so callers only run
+    it when there is a validator to compare against.
+    """
+    with _finance_conn(autocommit=True) as con:
+        if not con:
+            raise RuntimeError("db_not_configured")
+
+        with con.cursor() as cur:
+            cur.execute(_FINANCE_VERSION_SQL)
+            return _finance_version_of(*cur.fetchone())
 
 
 # ---------------------------
 # Finance parsing (Greek friendly)
 # ---------------------------
-def _strip_accents(s: str) -> str:
+def _strip_accents_nfd(s: str) -> str:
     s = unicodedata.normalize("NFD", s or "")
     return "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
 
 
+# Per-codepoint result of _strip_accents_nfd for everything below U+3000 (Latin, Greek incl.
+# polytonic, punctuation, €, symbols); a single str.translate gives the same output for such text.
+def _build_accent_table(limit: int) -> dict:
+    table = {}
+    for c in range(0x80, limit):
+        out = _strip_accents_nfd(chr(c))
+        if out != chr(c):
+            table[c] = ord(out) if len(out) == 1 else (out or None)
+    return table
+
+
+_ACCENT_TR = _build_accent_table(0x3000)
+_ACCENT_TR_MISS_RE = re.compile("[^\u0000-\u2fff]")
+
+
+@lru_cache(maxsize=2048)
+def _strip_accents(s: str) -> str:
+    s = s or ""
+    if _ACCENT_TR_MISS_RE.search(s):
+        return _strip_accents_nfd(s)  # CJK/Hangul/emoji etc: take the general path
+    return s.translate(_ACCENT_TR)
+
+
+_WS_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
 def _norm(s: str) -> str:
     s = (s or "").strip().lower()
     s = _strip_accents(s)
-    s = re.sub(r"\s+", " ", s)
+    s = _WS_RE.sub(" ", s)
     return s
 
 
@@ -416,24 +855,45 @@ def _detect_property_slug(text: str) -> str | None:
     return None
 
 
+# in-process copy of finance_merchant_map as (normalized token, category) pairs;
+# other workers pick up new tokens within MERCHANT_MAP_TTL_SECONDS
+MERCHANT_MAP_TTL_SECONDS = float(os.getenv("MERCHANT_MAP_TTL_SECONDS", "60"))
+_merchant_map_rows: Optional[List[tuple]] = None
+_merchant_map_loaded_at = 0.0
+
+
+def _merchant_map_invalidate():
+    global _merchant_map_rows
+    _merchant_map_rows = None
+
+
+def _merchant_map_rows_cached():
+    global _merchant_map_rows, _merchant_map_loaded_at
+    rows = _merchant_map_rows
+    if rows is not None and time.monotonic() - _merchant_map_loaded_at < MERCHANT_MAP_TTL_SECONDS:
+        return rows
+
+    with _finance_conn(autocommit=True) as con:
+        if not con:
+            return None
+        with con.cursor() as cur:
+            cur.execute("SELECT token, category FROM finance_merchant_map")
+            rows = [(_norm(token), cat) for token, cat in cur.fetchall()]
+
+    _merchant_map_rows = rows
+    _merchant_map_loaded_at = time.monotonic()
+    return rows
+
+
 def merchant_map_guess_category(text: str):
-    con = _finance_conn()
-    if not con:
+    rows = _merchant_map_rows_cached()
+    if not rows:
         return None
+
     tl = _norm(text)
-    try:
-        with con:
-            with con.cursor() as cur:
-                cur.execute("SELECT token, category FROM finance_merchant_map")
-                rows = cur.fetchall()
-    finally:
-        try:
-            con.close()
-        except Exception:
-            pass
 
     for token, cat in rows:
-        if _norm(token) in tl:
+        if token in tl:
             return cat
     return None
 
@@ -452,10 +912,12 @@ _MAP_STOPWORDS = {
     "θεσσαλονικη", "θεσσαλονίκη", "βουρβουρου", "βουρβουρού",
     "vourvourou", "thessaloniki",
 }
+_MAP_STOPWORDS_NORM = frozenset(_norm(x) for x in _MAP_STOPWORDS)
 
 # Απλά regex για να πετάμε ημερομηνίες/ποσά
 _MAP_DATE_RE = re.compile(r"\b(\d{1,2}[/-]\d{1,2}([/-]\d{2,4})?|\d{4}-\d{2}-\d{2})\b")
 _MAP_AMOUNT_RE = re.compile(r"(?<!\w)\d+(?:[.,]\d+)?\s*(?:€|eur|euro)?\b", re.IGNORECASE)
+_MAP_NONWORD_RE = re.compile(r"[^\w\s\u0370-\u03FF\u1F00-\u1FFF]+")
 
 
 def _extract_map_token(raw_text: str) -> str:
@@ -473,13 +935,11 @@ def _extract_map_token(raw_text: str) -> str:
     t = _MAP_AMOUNT_RE.sub(" ", t)
 
     # κάνε τα πάντα "λέξεις"
-    t = re.sub(r"[^\w\s\u0370-\u03FF\u1F00-\u1FFF]+", " ", t)  # κρατά ελληνικά
+    t = _MAP_NONWORD_RE.sub(" ", t)  # κρατά ελληνικά
     parts = [p for p in t.split() if p]
 
-    stop_norm = {_norm(x) for x in _MAP_STOPWORDS}
-
     # extra blocklist: action-ish + categories-ish + property slugs
-    extra_block = set(stop_norm)
+    extra_block = set(_MAP_STOPWORDS_NORM)
     extra_block.update({
         "expense", "income",
         "thessaloniki", "vourvourou",
@@ -579,15 +1039,13 @@ def merchant_map_upsert(token: str, category: str):
         return
 
     # blocklist safety (μην μάθεις location/action/report noise)
-    stop_norm = {_norm(x) for x in _MAP_STOPWORDS}
-    if _norm(tok) in stop_norm:
+    if _norm(tok) in _MAP_STOPWORDS_NORM:
         return
 
-    con = _finance_conn()
-    if not con:
-        return
+    with _finance_conn() as con:
+        if not con:
+            return
 
-    try:
         with con:
             with con.cursor() as cur:
                 cur.execute(
@@ -600,11 +1058,7 @@ def merchant_map_upsert(token: str, category: str):
                     """,
                     (tok, cat),
                 )
-    finally:
-        try:
-            con.close()
-        except Exception:
-            pass
+    _merchant_map_invalidate()
 
 
 # ---------------------------
@@ -655,25 +1109,37 @@ _NUM_ONLY_RE = re.compile(r"^\s*\d+(?:[.,]\d{1,2})?\s*$")
 _LABEL_NOISE = {"θεσσαλονικη", "thessaloniki", "βουρβουρου", "vourvourou", "πληρωσα", "εισπραξα", "εξοδο", "εσοδο"}
 
 
+def _keywords_re(words):
+    """
+    One compiled alternation over pre-normalized keywords:
+    rx.search(_norm(text)) is equivalent to any(_norm(k) in _norm(text) for k in words).
+    """
+    keys = sorted({_norm(w) for w in words} - {""}, key=len, reverse=True)
+    return re.compile("|".join(re.escape(k) for k in keys))
+
+
+_EXPENSE_RE = _keywords_re(_EXPENSE_WORDS)
+_INCOME_RE = _keywords_re(_INCOME_WORDS)
+_ACTION_RE = _keywords_re(_ACTION_WORDS)
+_PROP_RES = [(slug, _keywords_re(keys)) for slug, keys in _PROP_MAP.items()]
+_CAT_RES = [(cat, _keywords_re(keys)) for cat, keys in _CAT_RULES]
+
+
 def _has_action_word(t: str) -> bool:
-    tl = _norm(t)
-    return any(w in tl for w in _ACTION_WORDS)
+    return _ACTION_RE.search(_norm(t)) is not None
 
 
-def _detect_property(t: str):
-    tl = _norm(t)
-    for slug, keys in _PROP_MAP.items():
-        for k in keys:
-            if _norm(k) in tl:
-                return slug
+def _detect_property(tl: str):
+    for slug, rx in _PROP_RES:
+        if rx.search(tl):
+            return slug
     return None
 
 
-def _detect_type(t: str):
-    tl = _norm(t)
-    if any(w in tl for w in _INCOME_WORDS):
+def _detect_type(tl: str):
+    if _INCOME_RE.search(tl):
         return "income"
-    if any(w in tl for w in _EXPENSE_WORDS):
+    if _EXPENSE_RE.search(tl):
         return "expense"
     return None
 
@@ -693,29 +1159,29 @@ def _detect_date(t: str):
 
 def _detect_amount(t: str):
     tmp = _DATE_RE.sub(" ", t)  # μην “πιάνει” ημερομηνία ως ποσό
-    candidates = [m.group(1) for m in _EUR_AMOUNT_RE.finditer(tmp)]
-    if not candidates:
+    last = None
+    for last in _EUR_AMOUNT_RE.finditer(tmp):
+        pass
+    if last is None:
         return None
-    raw = candidates[-1].replace(",", ".")
+    raw = last.group(1).replace(",", ".")
     try:
         return round(float(raw), 2)
     except Exception:
         return None
 
 
-def _detect_category(t: str):
-    tl = _norm(t)
-    for cat, keys in _CAT_RULES:
-        if any(_norm(k) in tl for k in keys):
+def _detect_category(tl: str):
+    for cat, rx in _CAT_RES:
+        if rx.search(tl):
             return cat
     return "uncategorized"
 
 
-def _label_candidate(text: str):
+def _label_candidate(text: str, tl: str):
     t = (text or "").strip()
     if not t:
         return None
-    tl = _norm(t)
     if tl in _LABEL_NOISE:
         return None
     if _NUM_ONLY_RE.match(t):
@@ -724,8 +1190,10 @@ def _label_candidate(text: str):
 
 
 def parse_finance_fields(text: str) -> dict:
-    cat = _detect_category(text)
-    et = _detect_type(text)
+    # normalize once; the keyword detectors all work on the normalized form
+    tl = _norm(text)
+    cat = _detect_category(tl)
+    et = _detect_type(tl)
     amt = _detect_amount(text)
     prop = _detect_property_slug(text)
 
@@ -740,7 +1208,7 @@ def parse_finance_fields(text: str) -> dict:
 
     # Fallback to existing _detect_property if _detect_property_slug didn't find anything
     if prop is None:
-        prop = _detect_property(text)
+        prop = _detect_property(tl)
 
     return {
         "entry_type": et,
@@ -748,7 +1216,7 @@ def parse_finance_fields(text: str) -> dict:
         "amount": amt,
         "entry_date": _detect_date(text),
         "category": cat,
-        "label": _label_candidate(text),
+        "label": _label_candidate(text, tl),
         "raw_text": (text or "").strip(),
     }
 
@@ -773,9 +1241,11 @@ def looks_like_new_entry(fields: dict) -> bool:
     return bool(cat and cat != "uncategorized")
 
 
+_GREETINGS = frozenset({"γεια", "γεια σου", "καλημερα", "καλησπερα", "καληνυχτα", "hello", "hi"})
+
+
 def _is_greeting(msg: str) -> bool:
-    t = _norm(msg)
-    return t in ("γεια", "γεια σου", "καλημερα", "καλησπερα", "καληνυχτα", "hello", "hi")
+    return _norm(msg) in _GREETINGS
 
 
 def looks_like_strong_new_entry(message: str, fields: dict) -> bool:
@@ -791,15 +1261,7 @@ def looks_like_entry_intent(message: str, fields: dict) -> bool:
     if _is_greeting(message):
         return False
 
-    tl = _norm(message)
-
-    action_words = [
-        "πληρωσα", "πληωσα", "εδωσα", "αγορασα", "ψωνισα", "χρεωθηκα",
-        "εβαλα", "βαλα", "ηπια", "εφαγα", "επαιξα",
-        "εισπραξα", "ελαβα", "μπηκαν", "πληρωθηκα"
-    ]
-
-    if any(w in tl for w in action_words):
+    if _ACTION_RE.search(_norm(message)):
         return True
 
     if fields.get("amount") is not None:
@@ -865,16 +1327,27 @@ _REPORT_HINTS = (
     "εξοδ", "εσοδ", "κιν"
 )
 
+_REPORT_PREFIXES_NORM = tuple(dict.fromkeys(_norm(p) for p in REPORT_PREFIXES))
+
+_ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_DM_DATE_RE = re.compile(r"(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2}|\d{4}))?")
+# πιάνει: 2026-01-08, 8/1/26, 8-1-2026, αλλά και 8/1 (προαιρετικά)
+_DATE_TOKENS_RE = re.compile(r"\b(?:\d{4}-\d{2}-\d{2}|\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?)\b")
+_YM_RE = re.compile(r"\d{4}-\d{2}")
+_YM_SEARCH_RE = re.compile(r"\b(\d{4}-\d{2})\b")
+_REPORT_EXPENSE_RE = re.compile(r"\b(εξοδ\w*|exod\w*|expense(s)?)\b")
+_REPORT_INCOME_RE = re.compile(r"\b(εσοδ\w*|esod\w*|income(s)?)\b")
+
 
 def _parse_date_token(tok: str):
     tok = (tok or "").strip()
     if not tok:
         return None
 
-    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", tok):
+    if _ISO_DATE_RE.fullmatch(tok):
         return tok
 
-    m = re.fullmatch(r"(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2}|\d{4}))?", tok)
+    m = _DM_DATE_RE.fullmatch(tok)
     if m:
         d = int(m.group(1))
         mo = int(m.group(2))
@@ -897,11 +1370,7 @@ def _detect_date_range(message: str):
     if not message:
         return None
 
-    # πιάνει: 2026-01-08, 8/1/26, 8-1-2026, αλλά και 8/1 (προαιρετικά)
-    tokens = re.findall(
-        r"\b(?:\d{4}-\d{2}-\d{2}|\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?)\b",
-        _norm(message)
-    )
+    tokens = _DATE_TOKENS_RE.findall(_norm(message))
 
     parsed = []
     for t in tokens:
@@ -916,7 +1385,7 @@ def _detect_date_range(message: str):
 
 
 def _month_range(ym: str):
-    if not re.fullmatch(r"\d{4}-\d{2}", ym or ""):
+    if not _YM_RE.fullmatch(ym or ""):
         return None
     y = int(ym[:4])
     m = int(ym[5:7])
@@ -932,8 +1401,8 @@ def _detect_report_entry_type(msg: str):
     """
     m = _norm(msg or "")
 
-    has_exp = bool(re.search(r"\b(εξοδ\w*|exod\w*|expense(s)?)\b", m))
-    has_inc = bool(re.search(r"\b(εσοδ\w*|esod\w*|income(s)?)\b", m))
+    has_exp = bool(_REPORT_EXPENSE_RE.search(m))
+    has_inc = bool(_REPORT_INCOME_RE.search(m))
 
     # αν γράψει και τα 2, το αντιμετωπίζουμε σαν “all”
     if has_exp and not has_inc:
@@ -960,7 +1429,7 @@ def _parse_report_request(message: str):
     low = _norm(raw)
     rng = _detect_date_range(raw)
 
-    has_prefix = any(low.startswith(_norm(p)) for p in REPORT_PREFIXES)
+    has_prefix = low.startswith(_REPORT_PREFIXES_NORM)
     has_hint = any(h in low for h in _REPORT_HINTS)
 
     if not (has_prefix or has_hint or rng):
@@ -977,7 +1446,7 @@ def _parse_report_request(message: str):
 
     # Month default (αν γράψει “του μήνα” χωρίς range)
     if not date_from and ("μηνα" in low or "month" in low):
-        m2 = re.search(r"\b(\d{4}-\d{2})\b", low)
+        m2 = _YM_SEARCH_RE.search(low)
         if m2:
             rng2 = _month_range(m2.group(1))
         else:
@@ -1004,29 +1473,13 @@ def handle_report_in_chat(public_id: str, message: str):
     if not req:
         return None
 
-    rows = finance_list(
-        limit=50000,
+    count, total, top = finance_report_aggregate(
         property_slug=req["property_slug"],
         entry_type=req["entry_type"],  # "expense"/"income"/None
         date_from=req["date_from"],
         date_to=req["date_to"],
     )
 
-    total = 0.0
-    by_cat = defaultdict(lambda: {"count": 0, "sum": 0.0})
-
-    for r in rows:
-        try:
-            amt = float(r.get("amount") or 0)
-        except Exception:
-            amt = 0.0
-        total += amt
-        cat = (r.get("category") or "uncategorized").strip() or "uncategorized"
-        by_cat[cat]["count"] += 1
-        by_cat[cat]["sum"] += amt
-
-    top = sorted(by_cat.items(), key=lambda kv: kv[1]["sum"], reverse=True)[:5]
-
     kind = "Κινήσεις"
     if req["entry_type"] == "expense":
         kind = "Έξοδα"
@@ -1036,12 +1489,12 @@ def handle_report_in_chat(public_id: str, message: str):
     prop_txt = f" · {req['property_slug']}" if req["property_slug"] else ""
     reply_lines = [
         f"{kind} από {req['date_from']} έως {req['date_to']}{prop_txt}",
-        f"Σύνολο: {total:.2f} EUR · Πλήθος: {len(rows)}",
+        f"Σύνολο: {total:.2f} EUR · Πλήθος: {count}",
     ]
     if top:
         reply_lines.append("Top κατηγορίες:")
-        for cat, s in top:
-            reply_lines.append(f"- {cat}: {s['sum']:.2f} EUR ({s['count']})")
+        for cat, n, cat_total in top:
+            reply_lines.append(f"- {cat}: {cat_total:.2f} EUR ({n})")
 
     params = {}
     if req["entry_type"]:
@@ -1056,86 +1509,34 @@ def handle_report_in_chat(public_id: str, message: str):
 
     return {"reply": "\n".join(reply_lines), "download_url": download_url}
 
-PUBLIC_CHAT_HTML = r"""<!doctype html>
-<html lang="en">
-<head>
-  <meta charset="utf-8"/>
-  <meta name="viewport" content="width=device-width, initial-scale=1"/>
-  <title>{{ title or "Assistant" }}</title>
-  <style>
-    body { font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif; margin: 18px; background: #fff; color: #111; }
-    .wrap { max-width: 900px; margin: 0 auto; }
-    .muted { color:#666; font-size: 0.95rem; }
-    .card { border:1px solid #e5e5e5; border-radius: 12px; padding: 12px; margin: 12px 0; }
-    .row { display:flex; gap: 10px; align-items: center; flex-wrap: wrap; }
-    input[type="password"], input[type="text"], textarea {
-      border:1px solid #ccc; border-radius: 10px; padding: 10px; font-size: 1rem;
-    }
-    textarea { width: 100%; min-height: 90px; resize: vertical; }
-    button {
-      border:1px solid #ccc; background:#f7f7f7; border-radius: 10px;
-      padding: 10px 14px; cursor:pointer; font-size: 1rem;
-    }
-    button:hover { background:#efefef; }
-    button.primary { background:#111; color:#fff; border-color:#111; }
-    button.primary:hover { background:#000; }
-    .pill { display:inline-block; padding: 2px 8px; border-radius: 999px; background:#f1f1f1; font-size: 0.9rem; }
-    #log { white-space: pre-wrap; font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace; font-size: 0.95rem; }
-    .err { color:#b00020; }
-    .ok { color:#0a7b34; }
-    .line.user { font-weight: 600; }
-    .line.bot  { margin-left: 14px; }
-  </style>
-</head>
-<body>
-  <div class="wrap">
-    <h2>{{ title or "Assistant" }}</h2>
-    <div class="muted">Key is stored locally in your browser (one-time per device).</div>
-
-    <div class="card" id="keyBox" style="{{ '' if requires_key else 'display:none;' }}">
-      <div class="row">
-        <input id="apiKey" type="password" placeholder="Paste finance key once" autocomplete="off" style="min-width: 280px;">
-        <button id="toggleKey" type="button">Show</button>
-        <button id="saveKey" class="primary" type="button">Save</button>
-        <button id="forgetKey" type="button">Forget</button>
-        <span id="keyStatus" class="pill"></span>
-      </div>
-      <div class="muted" style="margin-top:8px;">
-        Tip: If you previously used ?k=... in the URL, this page will auto-save it once and remove it from the address bar.
-      </div>
-    </div>
-
-    <div class="card">
-      <div class="row" style="justify-content: space-between;">
-        <div>
-          <strong>Finance</strong>
-          <div class="muted">Example: “Πλήρωσα κήπο Βουρβουρού 60€ 2/1/2026”</div>
-        </div>
-        <div class="row">
-          <button id="undoLast" type="button">Undo last</button>
-          <button id="deleteById" type="button">Delete by ID</button>
-          <button id="downloadCsv" type="button">Download CSV</button>
-        </div>
-      </div>
-
-      <div id="log" style="margin-top:12px; padding:12px; background:#fafafa; border-radius: 12px; border:1px solid #eee; min-height: 120px;"></div>
-
-      <div style="margin-top:12px;">
-        <textarea id="msg" placeholder="Type a message..."></textarea>
-      </div>
-
-      <div class="row" style="margin-top:10px;">
-        <button id="send" class="primary" type="button">Send</button>
-        <span id="status" class="muted"></span>
-      </div>
-    </div>
-  </div>
+# Page assets are served separately with a content-hash query string so browsers cache them
+# long-term; only the small HTML shell (title + bootstrap ctx) is rendered per request.
+PUBLIC_CHAT_CSS = r"""body { font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif; margin: 18px; background: #fff; color: #111; }
+.wrap { max-width: 900px; margin: 0 auto; }
+.muted { color:#666; font-size: 0.95rem; }
+.card { border:1px solid #e5e5e5; border-radius: 12px; padding: 12px; margin: 12px 0; }
+.row { display:flex; gap: 10px; align-items: center; flex-wrap: wrap; }
+input[type="password"], input[type="text"], textarea {
+  border:1px solid #ccc; border-radius: 10px; padding: 10px; font-size: 1rem;
+}
+textarea { width: 100%; min-height: 90px; resize: vertical; }
+button {
+  border:1px solid #ccc; background:#f7f7f7; border-radius: 10px;
+  padding: 10px 14px; cursor:pointer; font-size: 1rem;
+}
+button:hover { background:#efefef; }
+button.primary { background:#111; color:#fff; border-color:#111; }
+button.primary:hover { background:#000; }
+.pill { display:inline-block; padding: 2px 8px; border-radius: 999px; background:#f1f1f1; font-size: 0.9rem; }
+#log { white-space: pre-wrap; font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace; font-size: 0.95rem; }
+.err { color:#b00020; }
+.ok { color:#0a7b34; }
+.line.user { font-weight: 600; }
+.line.bot  { margin-left: 14px; }
+"""
 
-<script>
-(function () {
-  const publicId = "{{ public_id }}";
-  const assistantSlug = "{{ assistant_slug }}";
-  const requiresKey = {{ "true" if requires_key else "false" }};
+PUBLIC_CHAT_JS = r"""(function () {
+  const { publicId, assistantSlug, requiresKey } = window.__CHAT_CTX;
 
   const STORAGE_KEY = `finance_key:${publicId}`;
   const CLIENT_KEY  = `client_id:${publicId}`;
@@ -1253,6 +1654,16 @@ PUBLIC_CHAT_HTML = r"""<!doctype html>
     });
   }
 
+  // Parse JSON bodies once with resp.json(); only non-JSON bodies (proxy error pages etc.)
+  // are read as text, for the error message.
+  async function readJson(resp) {
+    const ct = resp.headers.get("Content-Type") || "";
+    if (ct.includes("application/json")) {
+      try { return { data: await resp.json(), text: "" }; } catch (e) { return { data: null, text: "" }; }
+    }
+    return { data: null, text: await resp.text() };
+  }
+
   async function downloadWithAuth(path, filenamePrefix) {
     const clientId = getOrCreateClientId();
     const key = requiresKey ? getSavedKey() : "";
@@ -1308,9 +1719,7 @@ PUBLIC_CHAT_HTML = r"""<!doctype html>
         body: JSON.stringify({ assistant_id: assistantSlug, message })
       });
 
-      const text = await resp.text();
-      let data = null;
-      try { data = JSON.parse(text); } catch (e) {}
+      const { data, text } = await readJson(resp);
 
       appendLog(message, "user");
 
@@ -1380,9 +1789,7 @@ PUBLIC_CHAT_HTML = r"""<!doctype html>
         body: JSON.stringify({ confirm: true, property_slug: null })
       });
 
-      const text = await resp.text();
-      let data = null;
-      try { data = JSON.parse(text); } catch (e) {}
+      const { data, text } = await readJson(resp);
 
       if (!resp.ok) {
         setStatus("Undo failed.", true);
@@ -1427,9 +1834,7 @@ PUBLIC_CHAT_HTML = r"""<!doctype html>
         body: JSON.stringify({ confirm: true, id })
       });
 
-      const text = await resp.text();
-      let data = null;
-      try { data = JSON.parse(text); } catch (e) {}
+      const { data, text } = await readJson(resp);
 
       if (!resp.ok) {
         setStatus("Delete failed.", true);
@@ -1467,24 +1872,158 @@ PUBLIC_CHAT_HTML = r"""<!doctype html>
   getOrCreateClientId();
   appendLog("Ready.", "muted");
 })();
-</script>
+"""
+
+PUBLIC_CHAT_HTML = r"""<!doctype html>
+<html lang="en">
+<head>
+  <meta charset="utf-8"/>
+  <meta name="viewport" content="width=device-width, initial-scale=1"/>
+  <title>{{ title or "Assistant" }}</title>
+  <link rel="stylesheet" href="{{ css_url }}"/>
+</head>
+<body>
+  <div class="wrap">
+    <h2>{{ title or "Assistant" }}</h2>
+    <div class="muted">Key is stored locally in your browser (one-time per device).</div>
+
+    <div class="card" id="keyBox" style="{{ '' if requires_key else 'display:none;' }}">
+      <div class="row">
+        <input id="apiKey" type="password" placeholder="Paste finance key once" autocomplete="off" style="min-width: 280px;">
+        <button id="toggleKey" type="button">Show</button>
+        <button id="saveKey" class="primary" type="button">Save</button>
+        <button id="forgetKey" type="button">Forget</button>
+        <span id="keyStatus" class="pill"></span>
+      </div>
+      <div class="muted" style="margin-top:8px;">
+        Tip: If you previously used ?k=... in the URL, this page will auto-save it once and remove it from the address bar.
+      </div>
+    </div>
+
+    <div class="card">
+      <div class="row" style="justify-content: space-between;">
+        <div>
+          <strong>Finance</strong>
+          <div class="muted">Example: “Πλήρωσα κήπο Βουρβουρού 60€ 2/1/2026”</div>
+        </div>
+        <div class="row">
+          <button id="undoLast" type="button">Undo last</button>
+          <button id="deleteById" type="button">Delete by ID</button>
+          <button id="downloadCsv" type="button">Download CSV</button>
+        </div>
+      </div>
+
+      <div id="log" style="margin-top:12px; padding:12px; background:#fafafa; border-radius: 12px; border:1px solid #eee; min-height: 120px;"></div>
+
+      <div style="margin-top:12px;">
+        <textarea id="msg" placeholder="Type a message..."></textarea>
+      </div>
+
+      <div class="row" style="margin-top:10px;">
+        <button id="send" class="primary" type="button">Send</button>
+        <span id="status" class="muted"></span>
+      </div>
+    </div>
+  </div>
+
+<script>window.__CHAT_CTX = {{ ctx|tojson }};</script>
+<script src="{{ js_url }}"></script>
 
 </body>
 </html>
 """
+# compiled once through app.jinja_env (keeps Flask's autoescaping); render_template_string re-parses per call
+_PUBLIC_CHAT_TMPL = app.jinja_env.from_string(PUBLIC_CHAT_HTML)
 
 
-@app.after_request
-def force_utf8(resp):
-    if resp.mimetype == "application/json":
-        resp.headers["Content-Type"] = "application/json; charset=utf-8"
-    return resp
+def _static_asset(body: str, mimetype: str):
+    data = body.encode("utf-8")
+    return {"data": data, "mimetype": mimetype, "etag": hashlib.sha1(data).hexdigest()[:16]}
+
+
+_PUBLIC_CHAT_ASSETS = {
+    "public_chat.css": _static_asset(PUBLIC_CHAT_CSS, "text/css"),
+    "public_chat.js": _static_asset(PUBLIC_CHAT_JS, "application/javascript"),
+}
+
+
+def _asset_url(name: str) -> str:
+    return f"/assets/{name}?v={_PUBLIC_CHAT_ASSETS[name]['etag']}"
+
+
+@lru_cache(maxsize=256)
+def _render_public_page(public_id: str, slug: str, title: str, requires_key: bool) -> str:
+    # output depends only on these arguments (asset hashes are fixed per build)
+    return _PUBLIC_CHAT_TMPL.render(
+        requires_key=requires_key,
+        title=title,
+        ctx={"publicId": public_id, "assistantSlug": slug, "requiresKey": requires_key},
+        css_url=_asset_url("public_chat.css"),
+        js_url=_asset_url("public_chat.js"),
+    )
+
+
+@app.get("/assets/<name>")
+def public_chat_asset(name):
+    asset = _PUBLIC_CHAT_ASSETS.get(name)
+    if asset is None:
+        return jsonify(error="not_found"), 404
+    resp = Response(asset["data"], mimetype=asset["mimetype"])
+    resp.set_etag(asset["etag"])
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return resp.make_conditional(request)
+
+
+if orjson is None:
+    @app.after_request
+    def force_utf8(resp):
+        ct = resp.headers.get("Content-Type", "")
+        if ct.startswith("application/json") and "charset" not in ct:
+            resp.headers["Content-Type"] = "application/json; charset=utf-8"
+        return resp
 
 
 # ---------------------------
 # LLM runner
 # ---------------------------
-def _run_assistant(rec, message: str) -> str:
+# LLM_COALESCE=1 lets identical concurrent prompts share one Mistral call;
+# replies at temperature <= LLM_CACHE_MAX_TEMPERATURE are memoized for LLM_CACHE_TTL_SECONDS
+# (LLM_CACHE_SIZE=0 disables)
+LLM = CachedClient(
+    CoalescingClient(
+        MistralClient(),
+        enabled=(os.getenv("LLM_COALESCE") or "").strip().lower() in ("1", "true", "yes", "on"),
+    ),
+    maxsize=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+    max_temperature=float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.01")),
+    ttl=float(os.getenv("LLM_CACHE_TTL_SECONDS", "600")),
+)
+
+_LLM_PARAMS_CACHE: Dict[tuple, tuple] = {}
+_LLM_PARAMS_CACHE_MAX = 256
+
+
+def _llm_params_cache_key(rec):
+    # DB records are immutable per revision; filesystem ones per STORE reload
+    rev = _rec_get(rec, "revision_id", None)
+    if rev is not None:
+        return ("db", _assistant_id(rec), rev)
+    if isinstance(rec, AssistantConfig):
+        return ("fs", rec.assistant_id, STORE.version)
+    return None
+
+
+def _llm_params(rec) -> tuple:
+    """
+    Returns (system, model, temperature, max_tokens) for an assistant record,
+    normalized once per assistant revision.
+    """
+    key = _llm_params_cache_key(rec)
+    if key is not None:
+        cached = _LLM_PARAMS_CACHE.get(key)
+        if cached is not None:
+            return cached
+
     cfg = _assistant_config(rec)
 
     prompt = (_rec_get(rec, "prompt", "") or "").strip()
@@ -1509,31 +2048,102 @@ def _run_assistant(rec, message: str) -> str:
     except Exception:
         max_tokens = 600
 
+    params = (system, model, temperature, max_tokens)
+    if key is not None:
+        if len(_LLM_PARAMS_CACHE) >= _LLM_PARAMS_CACHE_MAX:
+            _LLM_PARAMS_CACHE.clear()
+        _LLM_PARAMS_CACHE[key] = params
+    return params
+
+
+def _run_assistant(rec, message: str) -> str:
+    system, model, temperature, max_tokens = _llm_params(rec)
+
     messages = [
         {"role": "system", "content": system},
         {"role": "user", "content": message},
     ]
 
-    client = MistralClient()
-    return client.chat(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens)
+    return LLM.chat(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens)
+
+
+def _run_assistant_stream(rec, message: str):
+    system, model, temperature, max_tokens = _llm_params(rec)
+
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": message},
+    ]
+
+    return LLM.chat_stream(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens)
+
+
+def _sse_response(deltas):
+    """Wraps an iterator of reply deltas as a text/event-stream response."""
+    def gen():
+        try:
+            for d in deltas:
+                yield b"data: " + _json_bytes({"delta": d}) + b"\n\n"
+        except Exception as e:
+            # headers are already sent, so report it in-band with the same
+            # body _handle_any_exception gives the non-stream path
+            app.logger.exception("LLM stream failed")
+            err = {"error": "server_error"}
+            if DEBUG_MODE:
+                err.update(type=e.__class__.__name__, detail=str(e))
+            yield b"event: error\ndata: " + _json_bytes(err) + b"\n\n"
+            return
+        yield b"data: [DONE]\n\n"
+
+    resp = Response(stream_with_context(gen()), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
 
 
 # ---------------------------
 # Routes
 # ---------------------------
-@app.get("/health")
-def health():
-    assistants = STORE.list(enabled_only=False)
-    return jsonify(
+def _health_payload() -> dict:
+    return dict(
         ok=True,
         build=APP_BUILD,
         started_at=APP_STARTED_AT,
         assistants_dir=str(ASSISTANTS_DIR),
-        assistants_count=len(assistants),
+        assistants_count=STORE.count(enabled_only=False),
         db_enabled=bool(db_store),
     )
 
 
+def _health_body() -> bytes:
+    return _json_bytes(_health_payload())
+
+
+_HEALTH_BODY = _health_body()
+
+
+def _fast_health(wsgi_app):
+    # Health checkers hit this many times a minute; answer before Flask dispatch.
+    def middleware(environ, start_response):
+        if environ.get("PATH_INFO") == "/health" and environ.get("REQUEST_METHOD") == "GET":
+            body = _HEALTH_BODY
+            start_response("200 OK", [
+                ("Content-Type", "application/json; charset=utf-8"),
+                ("Content-Length", str(len(body))),
+            ])
+            return [body]
+        return wsgi_app(environ, start_response)
+    return middleware
+
+
+app.wsgi_app = _fast_health(app.wsgi_app)
+
+
+@app.get("/health")
+def health():
+    return jsonify(_health_payload())
+
+
 @app.post("/admin/reset_finance")
 @admin_required
 def admin_reset_finance():
@@ -1541,11 +2151,11 @@ def admin_reset_finance():
         return jsonify({"ok": False, "error": "DATABASE_URL not set"}), 500
 
     try:
-        with psycopg2.connect(DATABASE_URL, sslmode=os.getenv("PGSSLMODE", "require")) as con:
-            with con.cursor() as cur:
-                cur.execute("DELETE FROM finance_entries")
-                deleted = cur.rowcount
-            con.commit()
+        with _finance_conn() as con:
+            with con:
+                with con.cursor() as cur:
+                    cur.execute("DELETE FROM finance_entries")
+                    deleted = cur.rowcount
         return jsonify({"ok": True, "deleted": deleted}), 200
     except Exception as e:
         app.logger.exception("admin_reset_finance failed")
@@ -1560,13 +2170,59 @@ def list_assistants():
     return jsonify({"assistants": db_store.list_admin()})
 
 
+# Editors can fire many /reload calls per second; the first one runs right
+# away, the rest inside the window collapse into a single trailing reload.
+RELOAD_DEBOUNCE_SECONDS = float(os.getenv("RELOAD_DEBOUNCE_SECONDS", "1.0"))
+_reload_lock = threading.Lock()
+_last_reload_ts = 0.0
+_last_reload_seeded: dict = {}
+_reload_timer = None
+
+
+def _do_reload() -> dict:
+    global _HEALTH_BODY, _last_reload_seeded
+    seeded = db_store.seed_from_filesystem(str(ASSISTANTS_DIR))
+    _last_reload_seeded = seeded
+    _public_assistant_cache_clear()
+    _LLM_PARAMS_CACHE.clear()
+    LLM.cache_clear()
+    _HEALTH_BODY = _health_body()
+    return seeded
+
+
+def _trailing_reload():
+    global _reload_timer, _last_reload_ts
+    with _reload_lock:
+        _reload_timer = None
+        _last_reload_ts = time.monotonic()
+    try:
+        _do_reload()
+    except Exception:
+        app.logger.exception("debounced reload failed")
+
+
 @app.post("/reload")
 @admin_required
 def reload_assistants():
+    global _reload_timer, _last_reload_ts
     try:
         if not db_store:
             return jsonify(ok=False, error="db_not_configured"), 500
-        seeded = db_store.seed_from_filesystem(str(ASSISTANTS_DIR))
+
+        with _reload_lock:
+            now = time.monotonic()
+            dt = now - _last_reload_ts
+            if dt < RELOAD_DEBOUNCE_SECONDS:
+                if _reload_timer is None:
+                    _reload_timer = threading.Timer(RELOAD_DEBOUNCE_SECONDS - dt, _trailing_reload)
+                    _reload_timer.daemon = True
+                    _reload_timer.start()
+                # same shape as a full reload; `seeded` is from the last reload that ran,
+                # the trailing one picks up this request's changes
+                return jsonify(ok=True, debounced=True, seeded=_last_reload_seeded, assistants=db_store.list_admin())
+            _last_reload_ts = now
+
+        seeded = _do_reload()
         return jsonify(ok=True, seeded=seeded, assistants=db_store.list_admin())
     except Exception as e:
         app.logger.exception("reload failed")
@@ -1580,6 +2236,7 @@ def admin_publish(assistant_id: str):
         return jsonify({"error": "db_not_configured"}), 500
     try:
         pid = db_store.publish(assistant_id)
+        _public_assistant_cache_clear()
         return jsonify({"public_id": pid})
     except ValueError as e:
         if str(e) == "assistant_not_found":
@@ -1597,6 +2254,7 @@ def admin_unpublish(assistant_id: str):
         return jsonify({"error": "db_not_configured"}), 500
     try:
         db_store.unpublish(assistant_id)
+        _public_assistant_cache_clear()
         return jsonify({"ok": True})
     except Exception as e:
         app.logger.exception("unpublish failed")
@@ -1610,6 +2268,7 @@ def admin_rotate_public_id(assistant_id: str):
         return jsonify({"error": "db_not_configured"}), 500
     try:
         pid = db_store.rotate_public_id(assistant_id)
+        _public_assistant_cache_clear()
         return jsonify({"public_id": pid})
     except Exception as e:
         app.logger.exception("rotate_public_id failed")
@@ -1631,13 +2290,7 @@ def public_page(public_id):
 
     requires_key = bool(cfg.get("requires_key") or cfg.get("require_key") or cfg.get("finance_requires_key"))
 
-    resp = make_response(render_template_string(
-        PUBLIC_CHAT_HTML,
-        public_id=public_id,
-        assistant_slug=slug,
-        requires_key=requires_key,
-        title=title,
-    ))
+    resp = make_response(_render_public_page(public_id, slug, str(title), requires_key))
     resp.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
     resp.headers["Pragma"] = "no-cache"
     resp.headers["Expires"] = "0"
@@ -1650,7 +2303,7 @@ def public_chat(public_id):
     if rl:
         return rl
 
-    data = request.get_json(silent=True) or {}
+    data = request.get_json(silent=True, cache=False) or {}
     assistant_id = (data.get("assistant_id") or "").strip()
     message = (data.get("message") or data.get("text") or data.get("input") or "").strip()
 
@@ -1681,6 +2334,11 @@ def public_chat(public_id):
 
         # Load pending early (needed for wizard merge even if message is not entryish)
         pending = finance_pending_get(public_id, client_id) or {}
+
+        # Greetings outside the wizard never parse as entries or reports; answer before parsing
+        if not pending and _is_greeting(message):
+            return jsonify(reply="Γράψε καταχώρηση π.χ. “Πλήρωσα νερό Βουρβουρού 20€ 05/01/2026” ή “Δώσε μου έξοδα από 6/1/2026 έως 8/1/2026”.")
+
         fields = parse_finance_fields(message)
 
         # Report intent priority (only if not in wizard)
@@ -1691,9 +2349,6 @@ def public_chat(public_id):
                 if rep:
                     return jsonify(rep)
 
-            if _is_greeting(message):
-                return jsonify(reply="Γράψε καταχώρηση π.χ. “Πλήρωσα νερό Βουρβουρού 20€ 05/01/2026” ή “Δώσε μου έξοδα από 6/1/2026 έως 8/1/2026”.")
-
         # If user is replying to category question
         if pending.get("awaiting_category"):
             chosen = _parse_category_reply(message, cfg)
@@ -1716,9 +2371,7 @@ def public_chat(public_id):
 
         # Admin-only debug
         if request.args.get("debug") == "1":
-            expected = (os.getenv("ADMIN_API_KEY") or "").strip()
-            provided = (request.headers.get("X-ADMIN-KEY") or "").strip()
-            if not expected or provided != expected:
+            if not _is_admin(request):
                 return jsonify(error="unauthorized"), 401
 
             return jsonify(
@@ -1766,6 +2419,7 @@ def public_chat(public_id):
                 return jsonify(reply="ΟΚ, ακυρώθηκε η τρέχουσα καταχώρηση ✅")
             if not is_entryish:
                 return jsonify(reply="Δεν το έπιασα σαν καταχώρηση. Π.χ. “Νερό Βουρβουρού 20€” ή “Airbnb 300€” ή “Δώσε μου έξοδα από 6/1/2026 έως 8/1/2026”.")
+            raw_text = fields.get("raw_text") or message.strip()
             pending = {
                 "entry_type": fields.get("entry_type"),
                 "property_slug": fields.get("property_slug"),
@@ -1773,8 +2427,8 @@ def public_chat(public_id):
                 "entry_date": fields.get("entry_date"),
                 "category": fields.get("category"),
                 "label": fields.get("label"),
-                "raw_text": fields.get("raw_text") or message.strip(),
-                "merchant_token": _extract_map_token(fields.get("raw_text") or message.strip()),
+                "raw_text": raw_text[-FINANCE_RAW_TEXT_MAX:],
+                "merchant_token": _extract_map_token(raw_text),
                 "awaiting_category": False,
                 "skip_category": False,
             }
@@ -1796,7 +2450,7 @@ def public_chat(public_id):
             rt = (pending.get("raw_text") or "").strip()
             msg2 = message.strip()
             if msg2 and msg2 not in rt:
-                pending["raw_text"] = (rt + " | " + msg2).strip(" |")
+                pending["raw_text"] = (rt + " | " + msg2)[-FINANCE_RAW_TEXT_MAX:].strip(" |")
 
             if not (pending.get("merchant_token") or "").strip():
                 pending["merchant_token"] = _extract_map_token(pending.get("raw_text") or message.strip())
@@ -1837,15 +2491,17 @@ def public_chat(public_id):
             "category": pending.get("category") or "uncategorized",
             "label": pending.get("label") or None,
             "note": None,
-            "raw_text": pending.get("raw_text") or message.strip(),
+            "raw_text": (pending.get("raw_text") or message.strip())[-FINANCE_RAW_TEXT_MAX:],
         }
 
-        finance_insert(entry)
-        finance_pending_clear(public_id, client_id)
+        finance_insert_and_clear_pending(entry, public_id, client_id)
 
         return jsonify(reply=f"Καταχωρήθηκε ✅ {entry['entry_type']} {entry['amount']}€ | {entry['property_slug']} | {entry['entry_date']} | {entry['category']}")
 
-    # default LLM
+    # default LLM ({"stream": true} opts into SSE deltas instead of one JSON reply)
+    if data.get("stream") is True:
+        return _sse_response(_run_assistant_stream(a, message))
+
     reply_text = _run_assistant(a, message)
     return jsonify(reply=reply_text)
 
@@ -1859,27 +2515,27 @@ def finance_undo_last(public_id):
     if err:
         return err
 
-    data = request.get_json(silent=True) or {}
+    data = request.get_json(silent=True, cache=False) or {}
     confirm = data.get("confirm") is True
     property_slug = (data.get("property_slug") or "").strip() or None
 
     if not confirm:
         return jsonify(error="Need {confirm:true, property_slug?:string}"), 400
 
-    con = _finance_conn()
-    if not con:
-        return jsonify(error="db_not_configured"), 500
+    with _finance_conn() as con:
+        if not con:
+            return jsonify(error="db_not_configured"), 500
 
-    try:
         with con:
             with con.cursor(cursor_factory=RealDictCursor) as cur:
-                if property_slug:
-                    cur.execute(
-                        "SELECT id, label, amount, entry_date FROM finance_entries WHERE property_slug=%s ORDER BY created_at DESC LIMIT 1",
-                        (property_slug,),
-                    )
-                else:
-                    cur.execute("SELECT id, label, amount, entry_date FROM finance_entries ORDER BY created_at DESC LIMIT 1")
+                # pick + delete in one statement (one round-trip, no gap between SELECT and DELETE)
+                where = "WHERE property_slug=%s " if property_slug else ""
+                cur.execute(
+                    "DELETE FROM finance_entries WHERE id = ("
+                    f"SELECT id FROM finance_entries {where}ORDER BY created_at DESC LIMIT 1"
+                    ") RETURNING id, label, amount, entry_date",
+                    (property_slug,) if property_slug else None,
+                )
 
                 row = cur.fetchone()
                 if not row:
@@ -1889,17 +2545,8 @@ def finance_undo_last(public_id):
                 entry_label = row.get("label") or ""
                 entry_amount = float(row.get("amount") or 0)
                 entry_date = str(row.get("entry_date") or "")
-                
-                cur.execute("DELETE FROM finance_entries WHERE id=%s", (entry_id,))
-                if cur.rowcount == 0:
-                    return jsonify(ok=True, message="Nothing to undo")
 
-        return jsonify(ok=True, deleted_id=entry_id, label=entry_label, amount=entry_amount, date=entry_date)
-    finally:
-        try:
-            con.close()
-        except Exception:
-            pass
+    return jsonify(ok=True, deleted_id=entry_id, label=entry_label, amount=entry_amount, date=entry_date)
 
 
 @app.post("/p/<public_id>/finance/delete")
@@ -1908,7 +2555,7 @@ def finance_delete(public_id):
     if err:
         return err
 
-    data = request.get_json(silent=True) or {}
+    data = request.get_json(silent=True, cache=False) or {}
     entry_id = (data.get("id") or "").strip()
     # hardening: handle quotes/spaces pasted by users
     entry_id = entry_id.strip().strip('"').strip("'").strip()
@@ -1917,17 +2564,16 @@ def finance_delete(public_id):
     if not entry_id or not confirm:
         return jsonify(error="Need {id:string, confirm:true}"), 400
 
-    con = _finance_conn()
-    if not con:
-        return jsonify(error="db_not_configured"), 500
+    with _finance_conn() as con:
+        if not con:
+            return jsonify(error="db_not_configured"), 500
 
-    with con:
-        with con.cursor() as cur:
-            cur.execute("DELETE FROM finance_entries WHERE id=%s", (entry_id,))
-            if cur.rowcount == 0:
-                return jsonify(error="Entry not found"), 404
+        with con:
+            with con.cursor() as cur:
+                cur.execute("DELETE FROM finance_entries WHERE id=%s", (entry_id,))
+                if cur.rowcount == 0:
+                    return jsonify(error="Entry not found"), 404
 
-    con.close()
     return jsonify(ok=True, deleted_id=entry_id)
 
 
@@ -1945,11 +2591,10 @@ def finance_recent(public_id):
 
     prop = (request.args.get("property_slug") or "").strip() or None
 
-    con = _finance_conn()
-    if not con:
-        return jsonify(error="db_not_configured"), 500
+    with _finance_conn(autocommit=True) as con:
+        if not con:
+            return jsonify(error="db_not_configured"), 500
 
-    with con:
         with con.cursor(cursor_factory=RealDictCursor) as cur:
             if prop:
                 cur.execute(
@@ -1965,7 +2610,6 @@ def finance_recent(public_id):
                 )
             rows = cur.fetchall()
 
-    con.close()
     return jsonify(ok=True, rows=rows)
 
 
@@ -1992,33 +2636,22 @@ def finance_summary(public_id):
     if not _valid_date(date_from) or not _valid_date(date_to):
         return jsonify(error="Invalid date. Use YYYY-MM-DD"), 400
 
-    where = []
-    args = []
-    if prop:
-        where.append("property_slug=%s"); args.append(prop)
-    if entry_type:
-        if entry_type not in ("expense", "income"):
-            return jsonify(error="type must be expense|income"), 400
-        where.append("entry_type=%s"); args.append(entry_type)
-    if date_from:
-        where.append("entry_date>=%s"); args.append(date_from)
-    if date_to:
-        where.append("entry_date<=%s"); args.append(date_to)
+    if entry_type and entry_type not in ("expense", "income"):
+        return jsonify(error="type must be expense|income"), 400
 
-    sql = "SELECT entry_type, COUNT(*) AS count, COALESCE(SUM(amount),0) AS total FROM finance_entries"
-    if where:
-        sql += " WHERE " + " AND ".join(where)
-    sql += " GROUP BY entry_type ORDER BY entry_type"
+    where_sql, args = _finance_where(prop, entry_type, date_from, date_to)
+    sql = (
+        "SELECT entry_type, COUNT(*) AS count, COALESCE(SUM(amount),0) AS total"
+        f" FROM finance_entries{where_sql} GROUP BY entry_type ORDER BY entry_type"
+    )
 
-    con = _finance_conn()
-    if not con:
-        return jsonify(error="db_not_configured"), 500
+    with _finance_conn(autocommit=True) as con:
+        if not con:
+            return jsonify(error="db_not_configured"), 500
 
-    with con:
         with con.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(sql, args)
             rows = cur.fetchall()
-    con.close()
 
     out = {"expense": {"count": 0, "total": 0}, "income": {"count": 0, "total": 0}}
     for r in rows:
@@ -2028,6 +2661,71 @@ def finance_summary(public_id):
     return jsonify(ok=True, filters={"from": date_from, "to": date_to, "property_slug": prop, "type": entry_type}, summary=out)
 
 
+_CSV_FLUSH_BYTES = 64 * 1024
+
+
+def _csv_chunks(rows):
+    buf = StringIO()
+    w = csv.writer(buf, lineterminator="\r\n")
+    buf.write("\ufeff")
+    w.writerow(_CSV_HEADER)
+    for r in rows:
+        w.writerow(r)
+        if buf.tell() >= _CSV_FLUSH_BYTES:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+def _csv_response(filename: str, **filters):
+    # the same data under the same URL yields the same body, so a revalidating
+    # client can be answered with 304 before running the export at all
+    if request.if_none_match:
+        etag = finance_version()
+        if request.if_none_match.contains_weak(etag):
+            resp = Response(status=304)
+            resp.set_etag(etag, weak=True)
+            resp.headers["Vary"] = "Accept-Encoding"
+            return resp
+
+    rows = finance_iter_csv_rows(**filters)
+    # fingerprint from the same snapshot as the exported rows
+    etag = next(rows)
+    chunks = _csv_chunks(rows)
+    # pull the first chunk now so DB errors still surface as a normal 500
+    # instead of a truncated download
+    first = next(chunks)
+
+    # CSV is mostly repeated dates/codes, so even gzip level 1 shrinks it several times over
+    gzipped = request.accept_encodings["gzip"] > 0
+
+    def body():
+        yield first
+        yield from chunks
+
+    def gen():
+        if not gzipped:
+            yield from body()
+            return
+        z = zlib.compressobj(1, zlib.DEFLATED, 31)
+        for chunk in body():
+            out = z.compress(chunk)
+            if out:
+                yield out
+        yield z.flush()
+
+    resp = Response(stream_with_context(gen()), mimetype="text/csv")
+    resp.headers["Content-Type"] = "text/csv; charset=utf-8"
+    resp.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    resp.headers["X-Accel-Buffering"] = "no"
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.set_etag(etag, weak=True)
+    if gzipped:
+        resp.headers["Content-Encoding"] = "gzip"
+    return resp
+
+
 @app.get("/p/<public_id>/report.csv")
 def finance_report_csv(public_id):
     a = _get_public_assistant(public_id)
@@ -2046,28 +2744,7 @@ def finance_report_csv(public_id):
     date_from = (request.args.get("from") or "").strip() or None
     date_to = (request.args.get("to") or "").strip() or None
 
-    rows = finance_list(limit=50000, property_slug=property_slug, entry_type=entry_type, date_from=date_from, date_to=date_to)
-
-    buf = StringIO()
-    w = csv.writer(buf, lineterminator="\r\n")
-    w.writerow(["date", "property", "type", "amount", "currency", "category", "label", "id"])
-    for r in rows:
-        w.writerow([
-            r.get("entry_date"),
-            r.get("property_slug"),
-            r.get("entry_type"),
-            r.get("amount"),
-            r.get("currency", "EUR"),
-            r.get("category", ""),
-            r.get("label", ""),
-            r.get("id"),
-        ])
-
-    csv_text = "\ufeff" + buf.getvalue()
-    resp = make_response(csv_text)
-    resp.headers["Content-Type"] = "text/csv; charset=utf-8"
-    resp.headers["Content-Disposition"] = "attachment; filename=finance_report.csv"
-    return resp
+    return _csv_response("finance_report.csv", limit=50000, property_slug=property_slug, entry_type=entry_type, date_from=date_from, date_to=date_to)
 
 
 @app.get("/p/<public_id>/export.csv")
@@ -2083,28 +2760,7 @@ def finance_export(public_id):
     if slug != "finance_clerk":
         return jsonify(error="not_finance_clerk"), 404
 
-    rows = finance_list(limit=5000)
-
-    buf = StringIO()
-    w = csv.writer(buf, lineterminator="\r\n")
-    w.writerow(["date", "property", "type", "amount", "currency", "category", "label", "id"])
-    for r in rows:
-        w.writerow([
-            r.get("entry_date"),
-            r.get("property_slug"),
-            r.get("entry_type"),
-            r.get("amount"),
-            r.get("currency", "EUR"),
-            r.get("category", ""),
-            r.get("label", ""),
-            r.get("id"),
-        ])
-
-    csv_text = "\ufeff" + buf.getvalue()
-    resp = make_response(csv_text)
-    resp.headers["Content-Type"] = "text/csv; charset=utf-8"
-    resp.headers["Content-Disposition"] = "attachment; filename=finance_entries.csv"
-    return resp
+    return _csv_response("finance_entries.csv", limit=5000)
 
 
 if __name__ == "__main__":
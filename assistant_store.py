@@ -6,7 +6,7 @@ from pathlib import Path
 from typing import Dict, List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class AssistantConfig:
     assistant_id: str
     name: str
@@ -32,10 +32,17 @@ class AssistantStore:
     def __init__(self, base_dir: str = "assistants"):
         self.base_dir = Path(base_dir)
         self._assistants: Dict[str, AssistantConfig] = {}
+        self._all: List[AssistantConfig] = []
+        self._enabled: List[AssistantConfig] = []
+        # bumped on every reload so callers can key caches on (assistant_id, version)
+        self.version = 0
         self.reload()
 
     def reload(self) -> None:
         self._assistants = {}
+        self._all = []
+        self._enabled = []
+        self.version += 1
 
         if not self.base_dir.exists() or not self.base_dir.is_dir():
             print(f"[AssistantStore] base_dir not found or not a dir: {self.base_dir}")
@@ -98,13 +105,17 @@ class AssistantStore:
                 knowledge=knowledge,
             )
 
+        # sorted views are built once here instead of on every list() call
+        self._all = sorted(self._assistants.values(), key=lambda a: a.assistant_id)
+        self._enabled = [a for a in self._all if a.enabled]
+
         print(f"[AssistantStore] Loaded assistants: {list(self._assistants.keys())}")
 
     def list(self, enabled_only: bool = True) -> List[AssistantConfig]:
-        items = list(self._assistants.values())
-        if enabled_only:
-            items = [a for a in items if a.enabled]
-        return sorted(items, key=lambda a: a.assistant_id)
+        return list(self._enabled if enabled_only else self._all)
+
+    def count(self, enabled_only: bool = True) -> int:
+        return len(self._enabled if enabled_only else self._all)
 
     def get(self, assistant_id: str) -> Optional[AssistantConfig]:
         return self._assistants.get(assistant_id)
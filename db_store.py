@@ -15,7 +15,7 @@ def _normalize_db_url(url: str) -> str:
     return url
 
 
-@dataclass
+@dataclass(slots=True)
 class AssistantRecord:
     slug: str
     name: str
@@ -25,6 +25,7 @@ class AssistantRecord:
     config: Dict[str, Any]
     prompt: str
     knowledge: str
+    revision_id: Optional[int] = None
 
 
 class DBAssistantStore:
@@ -70,7 +71,7 @@ class DBAssistantStore:
     def get_by_slug(self, slug: str) -> Optional[AssistantRecord]:
         q = """
         SELECT a.slug, a.name, a.enabled, a.is_public, a.public_id,
-               r.config, r.prompt, r.knowledge
+               r.id AS revision_id, r.config, r.prompt, r.knowledge
         FROM assistants a
         JOIN assistant_revisions r ON r.id = a.current_revision_id
         WHERE a.slug = %s
@@ -88,12 +89,13 @@ class DBAssistantStore:
                 config=row["config"],
                 prompt=row["prompt"],
                 knowledge=row["knowledge"],
+                revision_id=row["revision_id"],
             )
 
     def get_by_public_id(self, public_id: str) -> Optional[AssistantRecord]:
         q = """
         SELECT a.slug, a.name, a.enabled, a.is_public, a.public_id,
-               r.config, r.prompt, r.knowledge
+               r.id AS revision_id, r.config, r.prompt, r.knowledge
         FROM assistants a
         JOIN assistant_revisions r ON r.id = a.current_revision_id
         WHERE a.public_id = %s AND a.is_public = TRUE
@@ -111,6 +113,7 @@ class DBAssistantStore:
                 config=row["config"],
                 prompt=row["prompt"],
                 knowledge=row["knowledge"],
+                revision_id=row["revision_id"],
             )
 
     def list_admin(self) -> List[Dict[str, Any]]:
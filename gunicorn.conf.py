@@ -0,0 +1,38 @@
+import os
+
+# Picked up automatically by `gunicorn app:app` (cwd gunicorn.conf.py).
+# Chat requests spend almost all their time waiting on Mistral/Postgres, so
+# gevent workers multiplex many in-flight requests per process; the gevent
+# worker monkey-patches sockets, which makes `requests` cooperative.
+bind = f"0.0.0.0:{os.getenv('PORT', '5050')}"
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gevent")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+
+def _psycopg2_gevent_wait(conn, timeout=None):
+    # libpq calls block the whole hub under gevent; drive the connection in
+    # non-blocking mode and park only this greenlet on the socket instead.
+    import psycopg2
+    from psycopg2 import extensions
+    from gevent.socket import wait_read, wait_write
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError(f"Bad result from poll: {state!r}")
+
+
+def post_fork(server, worker):
+    # the finance endpoints use psycopg2, which (unlike requests) is not
+    # made cooperative by gevent's monkey-patching
+    if worker_class == "gevent":
+        from psycopg2 import extensions
+        extensions.set_wait_callback(_psycopg2_gevent_wait)
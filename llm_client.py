@@ -1,6 +1,12 @@
 import os
+import json
+import hashlib
+import threading
+import time
 import requests
-from typing import List, Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
+from typing import List, Dict, Any, Iterator, Optional
 
 
 class LLMError(RuntimeError):
@@ -17,8 +23,13 @@ class MistralClient:
         self.api_key = api_key or os.getenv("MISTRAL_API_KEY")
         self.base_url = base_url or os.getenv("MISTRAL_BASE_URL", "https://api.mistral.ai/v1/chat/completions")
         self.timeout = timeout
+        # one Session per client so keep-alive connections are reused across chats;
+        # pool sized for concurrent gevent workers (requests defaults to 10 per host)
+        self.session = requests.Session()
+        pool_size = int(os.getenv("MISTRAL_POOL_SIZE", "20"))
+        self.session.mount("https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
 
-    def chat(self, model: str, messages: List[Dict[str, str]], temperature: float = 0.2, max_tokens: int = 600) -> str:
+    def _post(self, payload: Dict[str, Any], stream: bool = False) -> requests.Response:
         if not self.api_key:
             raise LLMError("Λείπει το MISTRAL_API_KEY (βάλε το σε .env ή env var).")
 
@@ -27,24 +38,161 @@ class MistralClient:
             "Content-Type": "application/json",
         }
 
-        payload: Dict[str, Any] = {
-            "model": model,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-        }
-
         try:
-            r = requests.post(self.base_url, headers=headers, json=payload, timeout=self.timeout)
+            r = self.session.post(self.base_url, headers=headers, json=payload, timeout=self.timeout, stream=stream)
         except requests.RequestException as e:
             raise LLMError(f"Network error προς LLM: {e}") from e
 
         if r.status_code >= 400:
             raise LLMError(f"LLM error {r.status_code}: {r.text}")
+        return r
 
+    def chat(self, model: str, messages: List[Dict[str, str]], temperature: float = 0.2, max_tokens: int = 600) -> str:
+        payload: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+
+        r = self._post(payload)
         data = r.json()
         try:
             return data["choices"][0]["message"]["content"]
         except Exception:
             raise LLMError(f"Απρόσμενο response format: {data}")
 
+    def chat_stream(self, model: str, messages: List[Dict[str, str]], temperature: float = 0.2, max_tokens: int = 600) -> Iterator[str]:
+        """
+        Same as chat() but with stream=True: returns an iterator of content
+        deltas. The request is sent (and HTTP errors raised) before returning.
+        """
+        payload: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+        return self._iter_deltas(self._post(payload, stream=True))
+
+    @staticmethod
+    def _iter_deltas(r: requests.Response) -> Iterator[str]:
+        with r:
+            for raw in r.iter_lines():
+                line = raw.decode("utf-8").strip() if raw else ""
+                if not line.startswith("data:"):
+                    continue
+                chunk = line[5:].strip()
+                if chunk == "[DONE]":
+                    break
+                try:
+                    delta = json.loads(chunk)["choices"][0]["delta"].get("content")
+                except Exception:
+                    raise LLMError(f"Απρόσμενο stream chunk: {chunk}")
+                if delta:
+                    yield delta
+
+
+class _InflightCall:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class CoalescingClient:
+    """
+    Wraps a MistralClient so identical concurrent chat() calls share a single
+    upstream request. The Chat Completions endpoint has no multi-prompt batch
+    form, so coalescing identical in-flight prompts is the batching we can do.
+    """
+
+    def __init__(self, client: MistralClient, enabled: bool = True):
+        self.client = client
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _InflightCall] = {}
+
+    def chat_stream(self, model: str, messages: List[Dict[str, str]], temperature: float = 0.2, max_tokens: int = 600) -> Iterator[str]:
+        return self.client.chat_stream(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens)
+
+    def chat(self, model: str, messages: List[Dict[str, str]], temperature: float = 0.2, max_tokens: int = 600) -> str:
+        if not self.enabled:
+            return self.client.chat(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens)
+
+        key = json.dumps([model, messages, temperature, max_tokens], ensure_ascii=False, sort_keys=True)
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _InflightCall()
+                self._inflight[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self.client.chat(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+        return call.result
+
+
+class CachedClient:
+    """
+    Bounded LRU in front of chat() for (near-)deterministic calls. Replies
+    sampled with temperature above max_temperature are never cached, and
+    entries expire after ttl seconds (ttl <= 0 keeps them until evicted).
+    """
+
+    def __init__(self, client, maxsize: int = 1024, max_temperature: float = 0.01, ttl: float = 0):
+        self.client = client
+        self.maxsize = maxsize
+        self.max_temperature = max_temperature
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def chat_stream(self, model: str, messages: List[Dict[str, str]], temperature: float = 0.2, max_tokens: int = 600) -> Iterator[str]:
+        return self.client.chat_stream(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens)
+
+    def chat(self, model: str, messages: List[Dict[str, str]], temperature: float = 0.2, max_tokens: int = 600) -> str:
+        if self.maxsize <= 0 or temperature > self.max_temperature:
+            return self.client.chat(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens)
+
+        raw = json.dumps([model, messages, temperature, max_tokens], ensure_ascii=False, sort_keys=True)
+        key = hashlib.blake2b(raw.encode("utf-8"), digest_size=16).digest()
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                expires_at, reply = hit
+                if expires_at is None or expires_at > now:
+                    self._cache.move_to_end(key)
+                    return reply
+                del self._cache[key]
+
+        reply = self.client.chat(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens)
+
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            self._cache[key] = (expires_at, reply)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return reply